@@ -1,15 +1,108 @@
-import pandas as pd
+import argparse
+import glob
 import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cleaning_rules import DEFAULT_RULES, apply_winsor_bounds, report
+
+# Per-year extraction outputs of every exchange, e.g. asx_fin_data_2022.csv
+DEFAULT_PATTERNS = ["asx_fin_data_*.csv", "hk_fin_data_*.csv", "fin_data_*.csv"]
+KEY_COLUMNS = ["Company code", "Year"]
+
+_YEAR_FILE = re.compile(r"_(\d{4})\.csv$")
+
+
+# Function to list the year files matched by the patterns, skipping cleaned outputs and duplicates
+def input_files(patterns):
+    paths = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            name = os.path.basename(path)
+            if _YEAR_FILE.search(name) and not name.startswith("cleaned_") and path not in paths:
+                paths.append(path)
+    return paths
+
+
+# Function to clean one chunk: apply the row-level rules, then drop keys already seen in earlier chunks
+def clean_chunk(chunk, seen, rules, counts):
+    chunk = rules.apply(chunk, counts)
+    keys = list(zip(*(chunk[column].astype(str) for column in KEY_COLUMNS)))
+    keep = []
+    for key in keys:
+        keep.append(key not in seen)
+        seen.add(key)
+    if len(keep) - sum(keep):
+        counts["duplicate key"] += len(keep) - sum(keep)
+    return chunk.loc[np.array(keep, dtype=bool)]
+
+
+# Function to append chunks to an open CSV, writing the header with the first non-empty chunk.
+# Returns whether the header has been written so far.
+def _write_chunk(chunk, output, header_written):
+    if chunk.empty:
+        return header_written
+    chunk.to_csv(output, index=False, header=not header_written)
+    return True
+
+
+# Function to stream one file through clean_chunk and write cleaned_<name> next to it (or to output_dir).
+# Winsorization needs quantiles of the whole file, so it runs as a second streaming pass over the cleaned rows.
+def clean_file(path, output_dir=None, chunksize=100_000, rules=DEFAULT_RULES):
+    output_file = os.path.join(output_dir or os.path.dirname(path), f"cleaned_{os.path.basename(path)}")
+    temp_file = f"{output_file}.tmp"
+    seen = set()
+    counts = Counter()
+    winsorized = [column for column, _, _ in rules.winsorize]
+    kept_values = []
+    rows_in = rows_out = 0
+    columns = None
+    header_written = False
+    with open(temp_file, "w", newline="", encoding="utf-8") as output:
+        for chunk in pd.read_csv(path, encoding="ISO-8859-1", chunksize=chunksize):
+            columns = chunk.columns
+            cleaned = clean_chunk(chunk, seen, rules, counts)
+            header_written = _write_chunk(cleaned, output, header_written)
+            kept_values.append(cleaned[[column for column in winsorized if column in cleaned.columns]])
+            rows_in += len(chunk)
+            rows_out += len(cleaned)
+        # Every row dropped: still leave a header so readers see a valid, empty file
+        if not header_written and columns is not None:
+            pd.DataFrame(columns=columns).to_csv(output, index=False)
+
+    bounds = rules.winsor_bounds(pd.concat(kept_values)) if winsorized and rows_out else {}
+    if bounds:
+        winsor_file = f"{output_file}.winsor.tmp"
+        header_written = False
+        with open(winsor_file, "w", newline="", encoding="utf-8") as output:
+            for chunk in pd.read_csv(temp_file, chunksize=chunksize):
+                header_written = _write_chunk(apply_winsor_bounds(chunk, bounds, counts), output, header_written)
+        os.replace(winsor_file, temp_file)
+    os.replace(temp_file, output_file)
+    return output_file, rows_in, rows_out, counts
 
-input_file = "hk_fin_data_2022.csv"
 
-data = pd.read_csv(input_file, encoding='ISO-8859-1')
-data.replace([float('inf'), float('-inf')], float('nan'), inplace=True)
-data_cleaned = data.dropna()
-data_cleaned = data_cleaned.drop_duplicates(subset="Company code")
-data_cleaned.reset_index(drop=True, inplace=True)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean every per-year extraction output in one pass")
+    parser.add_argument("patterns", nargs="*", default=DEFAULT_PATTERNS, help="Glob(s) of year files to clean")
+    parser.add_argument("--output-dir", help="Where to write cleaned_* files (default: next to each input)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows read per chunk")
+    parser.add_argument("--workers", type=int, help="Processes to use (default: one per core)")
+    args = parser.parse_args()
 
-output_file = f"cleaned_{os.path.basename(input_file)}"
-data_cleaned.to_csv(output_file, index=False)
+    paths = input_files(args.patterns)
+    if not paths:
+        parser.error("no input files matched")
 
-print(f"Cleaned data saved to {output_file}")
+    # One file per process; each file is streamed in chunks so memory stays bounded
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = executor.map(
+            clean_file, paths, [args.output_dir] * len(paths), [args.chunksize] * len(paths)
+        )
+        for output_file, rows_in, rows_out, counts in results:
+            print(f"Cleaned data saved to {output_file} ({rows_out} of {rows_in} rows kept)")
+            report(counts, output_file)
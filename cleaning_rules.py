@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# Column-level cleaning rules, applied to whole frames at once.
+# required:  rows missing any of these columns are dropped
+# ranges:    (column, low, high) values outside [low, high] become NaN; the row is dropped only if the column is required
+# clip:      (column, low, high) hard bounds values are clipped to
+# winsorize: (column, lower quantile, upper quantile) bounds taken from the whole file
+# None means no bound on that side.
+@dataclass(frozen=True)
+class CleaningRules:
+    required: tuple = ()
+    ranges: tuple = ()
+    clip: tuple = ()
+    winsorize: tuple = ()
+
+    # Function to apply the row-level rules (inf, ranges, required, clip) to one frame or chunk.
+    # Returns the cleaned frame; `counts` is updated with rows dropped and values changed per rule.
+    def apply(self, frame, counts):
+        frame = frame.replace([np.inf, -np.inf], np.nan)
+
+        for column, low, high in self.ranges:
+            if column not in frame.columns:
+                continue
+            values = pd.to_numeric(frame[column], errors="coerce")
+            outside = _outside(values, low, high)
+            if outside.any():
+                counts[f"range {column}"] += int(outside.sum())
+                frame[column] = values.mask(outside)
+
+        # A row is counted against the first required column it is missing
+        keep = pd.Series(True, index=frame.index)
+        for column in self.required:
+            missing = keep & (frame[column].isna() if column in frame.columns else True)
+            if missing.any():
+                counts[f"required {column}"] += int(missing.sum())
+                keep &= ~missing
+        frame = frame[keep]
+
+        clipped = {
+            column: _clip(frame[column], low, high, counts, f"clip {column}")
+            for column, low, high in self.clip
+            if column in frame.columns
+        }
+        return frame.assign(**clipped)
+
+    # Function to work out the winsorization bounds for a file from its winsorized columns
+    def winsor_bounds(self, frame):
+        bounds = {}
+        for column, lower, upper in self.winsorize:
+            if column not in frame.columns:
+                continue
+            values = pd.to_numeric(frame[column], errors="coerce")
+            bounds[column] = (
+                None if lower is None else values.quantile(lower),
+                None if upper is None else values.quantile(upper),
+            )
+        return bounds
+
+
+def _outside(values, low, high):
+    outside = pd.Series(False, index=values.index)
+    if low is not None:
+        outside |= values < low
+    if high is not None:
+        outside |= values > high
+    return outside
+
+
+# Function to clip a column to [low, high], counting how many values moved
+def _clip(values, low, high, counts, rule):
+    values = pd.to_numeric(values, errors="coerce")
+    clipped = values.clip(lower=low, upper=high)
+    changed = int(((clipped != values) & values.notna()).sum())
+    if changed:
+        counts[rule] += changed
+    return clipped
+
+
+# Function to clip the winsorized columns of one frame or chunk to precomputed bounds
+def apply_winsor_bounds(frame, bounds, counts):
+    for column, (low, high) in bounds.items():
+        frame[column] = _clip(frame[column], low, high, counts, f"winsorize {column}")
+    return frame
+
+
+# Function to print rows dropped and values changed per rule
+def report(counts, label):
+    if not counts:
+        print(f"{label}: no rule changed anything")
+        return
+    details = ", ".join(f"{rule}: {count}" for rule, count in sorted(counts.items()))
+    print(f"{label}: {details}")
+
+
+# Default rules: keep every row with a company, a year and a usable price; leave other gaps as NaN
+DEFAULT_RULES = CleaningRules(
+    required=("Company code", "Year", "Year end price"),
+    ranges=(
+        ("Year end price", 0, None),
+        ("Market Cap", 0, None),
+        ("Total Assets", 0, None),
+        ("DAR", 0, None),
+        ("DY", 0, None),
+        ("DIV", 0, None),
+    ),
+    clip=(
+        ("P/E Ratio", -1000, 1000),
+        ("MB", -100, 100),
+    ),
+    winsorize=(
+        ("P/E Ratio", 0.01, 0.99),
+        ("MB", 0.01, 0.99),
+    ),
+)
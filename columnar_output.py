@@ -0,0 +1,107 @@
+import os
+import threading
+import uuid
+from collections import defaultdict
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only needed for --columnar output
+    pa = None
+
+# Text columns; every other output column is a float64 metric and Year is int64
+TEXT_COLUMNS = ["Company code", "Company Name", "Sector", "Industry"]
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow output needs pyarrow: pip install pyarrow")
+
+
+def build_schema(fieldnames):
+    _require_pyarrow()
+    fields = []
+    for name in fieldnames:
+        if name in TEXT_COLUMNS:
+            fields.append(pa.field(name, pa.string()))
+        elif name == "Year":
+            fields.append(pa.field(name, pa.int64()))
+        else:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Typed Parquet / Arrow IPC sink laid out as <root>/exchange=<name>/year=<year>/part-*.parquet
+class ColumnarSink:
+    def __init__(self, root, fieldnames, fmt="parquet", rows_per_file=5000):
+        _require_pyarrow()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown columnar format '{fmt}', expected one of {sorted(FORMATS)}")
+        self.root = root
+        self.fmt = fmt
+        self.rows_per_file = rows_per_file
+        self.schema = build_schema(fieldnames)
+        self._buffers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def write(self, profile, fin_data):
+        row = {}
+        for field in self.schema:
+            value = fin_data.get(field.name)
+            if field.name in TEXT_COLUMNS:
+                row[field.name] = None if value is None else str(value)
+            elif field.name == "Year":
+                row[field.name] = int(value)
+            else:
+                row[field.name] = _to_float(value)
+
+        key = (profile.name, row["Year"])
+        with self._lock:
+            self._buffers[key].append(row)
+            if len(self._buffers[key]) < self.rows_per_file:
+                return
+            rows = self._buffers.pop(key)
+        self._write_part(key, rows)
+
+    def close(self):
+        with self._lock:
+            buffers = dict(self._buffers)
+            self._buffers.clear()
+        for key, rows in buffers.items():
+            self._write_part(key, rows)
+
+    def _write_part(self, key, rows):
+        exchange, year = key
+        directory = os.path.join(self.root, f"exchange={exchange}", f"year={year}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{uuid.uuid4().hex}{FORMATS[self.fmt]}")
+
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        if self.fmt == "parquet":
+            pq.write_table(table, path)
+        else:
+            with pa.ipc.new_file(path, self.schema) as writer:
+                writer.write_table(table)
+        print(f"Wrote {len(rows)} rows to {path}")
+
+
+# Function to load a columnar dataset into pandas, reading only the requested columns
+def load_dataset(root, columns=None, exchange=None, year=None, fmt="parquet"):
+    _require_pyarrow()
+    dataset = ds.dataset(root, format="ipc" if fmt == "arrow" else fmt, partitioning="hive")
+    condition = None
+    if exchange is not None:
+        condition = ds.field("exchange") == exchange
+    if year is not None:
+        year_condition = ds.field("year") == year
+        condition = year_condition if condition is None else condition & year_condition
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
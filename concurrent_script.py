@@ -1,17 +1,34 @@
+import argparse
 import yfinance as yf
-import csv
+import numpy as np
 import pandas as pd
-import time
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import http_session
+import throttle
+from output_writer import OUTPUT
+from resilience import surface_yfinance_errors
+from http_session import get_session
+from sweep_journal import SweepJournal
+from yf_cache import cached_fetch
+
+# Journal key for the Financial_Data_YYYY.csv outputs
+JOURNAL_DATASET = "Financial_Data"
+
+HEADERS = ["Company Code", "Date", "Company Name", "Sector", "Industry", "EPS", "BVPS", "ROA", "ROE", "DAR", "DIV", "TOTAL ASSETS", "MARKET CAP", "P/E", "DY", "MB"]
 
 # Function to fetch balance sheet, income statement, and dividend data for a given ticker
 def fetch_ticker_data(comp_code):
     try:
-        fetch_obj = yf.Ticker(f"{comp_code}.AX")  # Using .AX suffix for ASX stocks
-        blc_sheet = fetch_obj.get_balance_sheet(as_dict=True, pretty=True, freq="yearly")
-        imc_stm = fetch_obj.get_income_stmt(as_dict=True, pretty=True, freq="yearly")
-        info = fetch_obj.info
-        dividends = fetch_obj.dividends  # Fetch dividend data
+        symbol = f"{comp_code}.AX"  # Using .AX suffix for ASX stocks
+        fetch_obj = yf.Ticker(symbol, session=get_session())
+        stmt_params = {"as_dict": True, "pretty": True, "freq": "yearly"}
+        blc_sheet = cached_fetch(symbol, "get_balance_sheet", "statement",
+                                 lambda: fetch_obj.get_balance_sheet(**stmt_params), stmt_params)
+        imc_stm = cached_fetch(symbol, "get_income_stmt", "statement",
+                               lambda: fetch_obj.get_income_stmt(**stmt_params), stmt_params)
+        info = cached_fetch(symbol, "info", "info", lambda: fetch_obj.info)
+        dividends = cached_fetch(symbol, "dividends", "price", lambda: fetch_obj.dividends)  # Fetch dividend data
         
         # Fetch additional company information
         company_name = info.get('longName', 'N/A')
@@ -23,89 +40,95 @@ def fetch_ticker_data(comp_code):
         print(f"Error fetching data for {comp_code}: {e}")
         return {}, {}, {}, {}, 'N/A', 'N/A', 'N/A'
 
-# Function to calculate financial ratios
-def calculate_ratios(blc_sheet, imc_stm, info, dividends, year, company_name, sector, industry):
-    ratios = {}
-    try:
-        net_income = imc_stm[year].get("Net Income", None)
-        total_assets = blc_sheet[year].get("Total Assets", None)
-        total_liabilities = blc_sheet[year].get("Total Liabilities Net Minority Interest", None)
-        shareholders_equity = blc_sheet[year].get("Total Equity Gross Minority Interest", None)
-        dividends_payable = blc_sheet[year].get("Dividends Payable", None)
-        total_debt = blc_sheet[year].get("Total Debt", None)
-        share_price = info.get("previousClose", None)
-        outstanding_shares = info.get("sharesOutstanding", None)
-
-        # Calculate financial ratios using normal division and handle potential errors
-        ratios["EPS"] = net_income / outstanding_shares if net_income and outstanding_shares else "NaN"
-        ratios["BVPS"] = shareholders_equity / outstanding_shares if shareholders_equity and outstanding_shares else "NaN"
-        ratios["ROA"] = (net_income / total_assets * 100) if net_income and total_assets else "NaN"
-        ratios["ROE"] = (net_income / shareholders_equity * 100) if net_income and shareholders_equity else "NaN"
-        ratios["DIV"] = dividends_payable / outstanding_shares if dividends_payable and outstanding_shares else "NaN"
-        ratios["DAR"] = (total_liabilities / total_assets * 100) if total_liabilities and total_assets else "NaN"
-        
-        # Replaced SIZE with TOTAL ASSETS
-        ratios["TOTAL ASSETS"] = total_assets if total_assets else "NaN"
-        
-        # Calculate MARKET CAP (Market Capitalization)
-        ratios["MARKET CAP"] = share_price * outstanding_shares if share_price and outstanding_shares else "NaN"
-
-        ratios["P/E"] = share_price / ratios["EPS"] if share_price and ratios["EPS"] != "NaN" else "NaN"
-        ratios["DY"] = (ratios["DIV"] / share_price * 100) if ratios["DIV"] != "NaN" and share_price else "NaN"
-        ratios["MB"] = share_price / ratios["BVPS"] if share_price and ratios["BVPS"] != "NaN" else "NaN"
-        
-        # Calculate the most recent dividend from the dividend history
-        if dividends is not None and not dividends.empty:
-            # Use the most recent dividend
-            last_dividend = dividends.iloc[-1]  # Most recent dividend
-            if outstanding_shares:
-                # Calculate Dividends Per Share (DPS) correctly
-                dps = last_dividend / outstanding_shares
-                ratios["DIV"] = dps  # Use DPS for dividend
-                ratios["DY"] = (dps / share_price * 100) if dps and share_price else "NaN"
-        
-        # Add company information to the ratios dictionary
-        ratios["Company Name"] = company_name
-        ratios["Sector"] = sector
-        ratios["Industry"] = industry
-        
-    except Exception as e:
-        print(f"Error calculating ratios for year {year}: {e}")
-        ratios = {key: "NaN" for key in ["EPS", "BVPS", "ROA", "ROE", "DIV", "DAR", "TOTAL ASSETS", "MARKET CAP", "P/E", "DY", "MB", "Company Name", "Sector", "Industry"]}
-    return ratios
-
-# Function to write financial data to a CSV file for a specific year
-def write_to_csv(comp_code, year, ratios):
+# Function to read one line item as a numeric column; zero counts as missing, like the old truthiness checks
+def _line_item(frame, name):
+    if name not in frame.columns:
+        return pd.Series(np.nan, index=frame.index)
+    values = pd.to_numeric(frame[name], errors="coerce")
+    return values.where(values != 0)
+
+
+def _info_value(info, key):
+    value = info.get(key)
+    return float(value) if value else np.nan
+
+
+# Function to calculate financial ratios for every balance sheet year at once
+def calculate_ratios(blc_sheet, imc_stm, info, dividends, company_name, sector, industry):
+    balance = pd.DataFrame(blc_sheet).T
+    income = pd.DataFrame(imc_stm).T.reindex(balance.index)
+
+    net_income = _line_item(income, "Net Income")
+    total_assets = _line_item(balance, "Total Assets")
+    total_liabilities = _line_item(balance, "Total Liabilities Net Minority Interest")
+    shareholders_equity = _line_item(balance, "Total Equity Gross Minority Interest")
+    dividends_payable = _line_item(balance, "Dividends Payable")
+    share_price = _info_value(info, "previousClose")
+    outstanding_shares = _info_value(info, "sharesOutstanding")
+
+    ratios = pd.DataFrame(index=balance.index)
+    ratios["EPS"] = net_income / outstanding_shares
+    ratios["BVPS"] = shareholders_equity / outstanding_shares
+    ratios["ROA"] = net_income / total_assets * 100
+    ratios["ROE"] = net_income / shareholders_equity * 100
+    ratios["DIV"] = dividends_payable / outstanding_shares
+    ratios["DAR"] = total_liabilities / total_assets * 100
+
+    # Replaced SIZE with TOTAL ASSETS
+    ratios["TOTAL ASSETS"] = total_assets
+
+    # Calculate MARKET CAP (Market Capitalization)
+    ratios["MARKET CAP"] = share_price * outstanding_shares
+
+    ratios["P/E"] = share_price / ratios["EPS"]
+    ratios["DY"] = ratios["DIV"] / share_price * 100
+    ratios["MB"] = share_price / ratios["BVPS"]
+
+    # Use the most recent dividend from the dividend history as Dividends Per Share (DPS)
+    if dividends is not None and len(dividends) and not np.isnan(outstanding_shares):
+        dps = dividends.iloc[-1] / outstanding_shares
+        ratios["DIV"] = dps
+        ratios["DY"] = dps / share_price * 100 if dps else np.nan
+
+    ratios = ratios.replace([np.inf, -np.inf], np.nan)
+    ratios = ratios.astype(object).where(ratios.notna(), "NaN")
+
+    # Add company information to the ratios
+    ratios["Company Name"] = company_name
+    ratios["Sector"] = sector
+    ratios["Industry"] = industry
+    return ratios.to_dict("index")
+
+# Function to queue financial data for the CSV file of a specific year on the shared writer thread
+def write_to_csv(comp_code, year, ratios, on_written=None):
     # Extract the year from the Timestamp object
     sanitized_year = str(year.year)
 
     # File name for the specific year
     output_file = f"Financial_Data_{sanitized_year}.csv"
-    headers = ["Company Code", "Date", "Company Name", "Sector", "Industry", "EPS", "BVPS", "ROA", "ROE", "DAR", "DIV", "TOTAL ASSETS", "MARKET CAP", "P/E", "DY", "MB"]
 
-    # Write header if the file does not exist
-    try:
-        with open(output_file, mode="x", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(headers)
-    except FileExistsError:
-        pass  # File already exists, no need to rewrite headers
-
-    # Write ratios to the CSV file
-    with open(output_file, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        # Construct the row using only the keys in the `ratios` dictionary
-        row = [comp_code, str(year.date())] + [ratios.get(key, "NaN") for key in headers[2:]]
-        writer.writerow(row)
-        print(f"Data for {comp_code} in {sanitized_year} written to {output_file}")
-
-def fetch_and_process_data(comp_code):
+    # Construct the row using only the keys in the `ratios` dictionary
+    row = dict(zip(HEADERS, [comp_code, str(year.date())] + [ratios.get(key, "NaN") for key in HEADERS[2:]]))
+    OUTPUT.write(output_file, row, HEADERS, on_written)
+
+def fetch_and_process_data(comp_code, journal=None):
     blc_sheet, imc_stm, info, dividends, company_name, sector, industry = fetch_ticker_data(comp_code)
 
     if blc_sheet and imc_stm and info:
-        for year in blc_sheet.keys():
-            ratios = calculate_ratios(blc_sheet, imc_stm, info, dividends, year, company_name, sector, industry)
-            write_to_csv(comp_code, year, ratios)
+        try:
+            ratios_by_year = calculate_ratios(blc_sheet, imc_stm, info, dividends, company_name, sector, industry)
+        except Exception as e:
+            print(f"Error calculating ratios for {comp_code}: {e}")
+            return
+        for year, ratios in ratios_by_year.items():
+            # Skip rows an earlier, interrupted run already wrote
+            if journal is not None and journal.row_written(JOURNAL_DATASET, comp_code, year.year):
+                continue
+            on_written = partial(journal.record_row, JOURNAL_DATASET, comp_code, year.year) if journal else None
+            write_to_csv(comp_code, year, ratios, on_written)
+        if journal is not None:
+            years = [year.year for year in blc_sheet.keys()]
+            OUTPUT.after_flush(partial(journal.mark_done, JOURNAL_DATASET, comp_code, years))
 
 # Main block to handle concurrent processing
 if __name__ == "__main__":
@@ -119,8 +142,24 @@ if __name__ == "__main__":
     # Limit to the first 20 companies (you can adjust this to fit your needs)
     company_data = company_data.head(2200)
 
-    # Use ThreadPoolExecutor for concurrent processing
-    with ThreadPoolExecutor(max_workers=3) as executor:  # Adjust max_workers as needed
-        executor.map(fetch_and_process_data, company_data["Ticker"])
-
-        time.sleep(5)  # Optional: To prevent hitting rate limits
+    parser = argparse.ArgumentParser(description="Extract ASX financial ratios into Financial_Data_<year>.csv")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted sweep instead of starting a fresh one")
+    args = parser.parse_args()
+
+    # Let throttling surface as exceptions so retries and backoff can react to it
+    surface_yfinance_errors()
+
+    # Rebuild the row index from existing output files; only a resumed sweep skips finished tickers
+    journal = SweepJournal()
+    journal.sync_outputs(JOURNAL_DATASET, "Company Code")
+    if not args.resume:
+        journal.reset(JOURNAL_DATASET)
+    done = journal.done_tickers(JOURNAL_DATASET)
+    tickers = [ticker for ticker in company_data["Ticker"] if str(ticker) not in done]
+    print(f"Resuming: {len(company_data) - len(tickers)} tickers already done, {len(tickers)} to go")
+
+    # Use ThreadPoolExecutor for concurrent processing; the shared throttle paces the requests themselves
+    http_session.configure(pool_size=throttle.CONCURRENCY.maximum)
+    with ThreadPoolExecutor(max_workers=throttle.CONCURRENCY.maximum) as executor:
+        executor.map(lambda ticker: fetch_and_process_data(ticker, journal), tickers)
+    OUTPUT.close()
@@ -0,0 +1,440 @@
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+import pandas as pd
+
+import http_session
+import throttle
+from hk_scanner import live_codes
+from incremental import stale_jobs
+from negative_cache import DEFAULT_NEGATIVE_CACHE, EMPTY_REASON, NegativeCache
+from output_writer import OUTPUT
+from prefilter import Prefilter, asx_universe, codes_universe, sgx_universe
+from ratios import compute_ratios, ticker_frame
+from resilience import classify_error, surface_yfinance_errors
+from row_store import DEFAULT_ROW_STORE, RowStore
+from sgx_snapshot import load_table
+from sweep_journal import SweepJournal
+from ticker_snapshot import fetch_snapshot
+from work_planner import plan_jobs
+
+# Every fetch below relies on seeing throttling and HTTP errors as exceptions
+surface_yfinance_errors()
+
+# Typed SGX price snapshot written by get_sing_ticker.py
+SGX_SNAPSHOT_FILE = "sgx_snapshot.npz"
+
+# Columns written for every exchange, in output order
+FIELDNAMES = [
+    "Company code",
+    "Company Name",
+    "Sector",
+    "Industry",
+    "Year",
+    "EPS",
+    "BVPS",
+    "ROA",
+    "ROE",
+    "DIV",
+    "P/E Ratio",
+    "DAR",
+    "MB",
+    "DY",
+    "Market Cap",
+    "Total Assets",
+    "Year end price",
+]
+
+
+# What differs between exchanges: ticker suffix, where the ticker universe comes from and the output prefix
+@dataclass(frozen=True)
+class ExchangeProfile:
+    name: str
+    suffix: str
+    output_prefix: str
+    load_universe: Callable[[], pd.DataFrame]
+    # Zero-padded code width and whether output codes keep the suffix (HKEX writes '0700.HK')
+    code_width: int = 0
+    suffixed_codes: bool = False
+
+    # Function to list the codes to fetch, pruned and ordered by an optional Prefilter
+    def load_codes(self, prefilter=None):
+        universe = self.load_universe()
+        if prefilter is not None:
+            universe = prefilter.apply(universe)
+        return list(universe["Code"])
+
+    # Function to bring a code from any input list to the form written in the outputs
+    def normalize(self, comp_code):
+        code = str(comp_code).strip().upper()
+        if code.endswith(self.suffix):
+            code = code[: -len(self.suffix)]
+        if not code:
+            return ""
+        code = code.zfill(self.code_width)
+        return f"{code}{self.suffix}" if self.suffixed_codes else code
+
+    def symbol(self, comp_code):
+        code = str(comp_code)
+        return code if code.endswith(self.suffix) else f"{code}{self.suffix}"
+
+    def output_file(self, year):
+        return f"{self.output_prefix}_{year}.csv"
+
+
+# Function to read one ticker column from a company list CSV
+def load_csv_column(path, column, limit=None):
+    company_data = pd.read_csv(path)
+    if column not in company_data.columns:
+        raise ValueError(f"The input CSV must have a '{column}' column")
+    if limit is not None:
+        company_data = company_data.head(limit)
+    return list(company_data[column])
+
+
+# SGX universe from the price snapshot table when present, otherwise the bare code list
+def sgx_codes(limit=2000):
+    if os.path.exists(SGX_SNAPSHOT_FILE):
+        return sgx_universe(load_table(SGX_SNAPSHOT_FILE)).head(limit)
+    return codes_universe(load_csv_column("company_codes.csv", "Company Code", limit=limit))
+
+
+ASX = ExchangeProfile(
+    name="ASX",
+    suffix=".AX",
+    output_prefix="asx_fin_data",
+    load_universe=lambda: asx_universe("companies-list.csv", limit=2000),
+)
+HKEX = ExchangeProfile(
+    name="HKEX",
+    suffix=".HK",
+    output_prefix="hk_fin_data",
+    # Phase 1 of the HK pipeline: only codes a batched quote probe found live (see hk_scanner)
+    load_universe=lambda: codes_universe(live_codes()),
+    code_width=4,
+    suffixed_codes=True,
+)
+SGX = ExchangeProfile(
+    name="SGX",
+    suffix=".SI",
+    output_prefix="fin_data",
+    load_universe=sgx_codes,
+)
+PROFILES = {"asx": ASX, "hkex": HKEX, "sgx": SGX}
+
+
+# Function to turn one ticker snapshot into a row per statement year
+def indicator_rows(comp_code, snapshot):
+    if snapshot.financials.empty:
+        return []
+
+    company_name = snapshot.info.get("longName", "N/A")
+    sector = snapshot.info.get("sector", "N/A")
+    industry = snapshot.info.get("industry", "N/A")
+
+    ratios = compute_ratios(ticker_frame(snapshot))
+    rows = []
+    for year, values in zip(ratios.index, ratios.to_dict("records")):
+        fin_data = {
+            "Company code": comp_code,
+            "Company Name": company_name,
+            "Sector": sector,
+            "Industry": industry,
+            "Year": int(year),
+        }
+        fin_data.update(values)
+        rows.append(fin_data)
+    return rows
+
+
+# Function to compute and write the rows for one fetched snapshot.
+# With a journal, rows already on disk are skipped and the ticker is marked done at the end.
+# Journal updates are deferred until the writer has flushed the rows they describe.
+def write_rows(profile, comp_code, snapshot, journal=None):
+    dataset = profile.output_prefix
+    rows = indicator_rows(comp_code, snapshot)
+    if NEGATIVE_CACHE is not None:
+        if rows:
+            NEGATIVE_CACHE.clear(snapshot.symbol)
+        else:
+            NEGATIVE_CACHE.record(snapshot.symbol, EMPTY_REASON)
+
+    years = []
+    for fin_data in rows:
+        year = fin_data["Year"]
+        years.append(year)
+        if journal is None:
+            write_to_csv(profile, fin_data)
+        elif not journal.row_written(dataset, comp_code, year):
+            write_to_csv(profile, fin_data, on_written=partial(journal.record_row, dataset, comp_code, year))
+    if journal is not None:
+        OUTPUT.after_flush(partial(journal.mark_done, dataset, comp_code, years))
+
+
+# Dead-letter file for tickers that failed, so they can be retried on their own
+DEAD_LETTER_FILE = "dead_letter.csv"
+DEAD_LETTER_FIELDS = ["Exchange", "Company code", "Kind", "Error"]
+
+
+def _report_failure(profile, comp_code, error, journal):
+    kind = classify_error(error)
+    print(f"Indicator error for {comp_code} ({kind}): {error}")
+    OUTPUT.write(
+        DEAD_LETTER_FILE,
+        {"Exchange": profile.name, "Company code": comp_code, "Kind": kind, "Error": str(error)},
+        DEAD_LETTER_FIELDS,
+    )
+    if journal is not None:
+        journal.mark_failed(profile.output_prefix, comp_code, error)
+    if NEGATIVE_CACHE is not None and kind == "not_found":
+        NEGATIVE_CACHE.record(profile.symbol(comp_code), str(error))
+
+
+# Function to turn a dead-letter file back into jobs; not_found tickers are left out unless asked for
+def dead_letter_jobs(path=DEAD_LETTER_FILE, include_not_found=False):
+    by_name = {profile.name: profile for profile in PROFILES.values()}
+    jobs = []
+    seen = set()
+    for row in pd.read_csv(path, dtype=str).to_dict("records"):
+        if row["Kind"] == "not_found" and not include_not_found:
+            continue
+        job = (by_name[row["Exchange"]], row["Company code"])
+        if job not in seen:
+            seen.add(job)
+            jobs.append(job)
+    return jobs
+
+
+# Function to take the tickers about to be retried out of a dead-letter file. Entries that are not
+# retried stay; a retry that fails again is appended anew by _report_failure, so successful retries
+# drop out and the file only ever lists what is still failing.
+def claim_dead_letters(path=DEAD_LETTER_FILE, include_not_found=False):
+    jobs = dead_letter_jobs(path, include_not_found)
+    letters = pd.read_csv(path, dtype=str)
+    if include_not_found:
+        remaining = letters.iloc[0:0]
+    else:
+        remaining = letters[letters["Kind"] == "not_found"]
+    remaining = remaining.drop_duplicates(["Exchange", "Company code"], keep="last")
+    temp_path = f"{path}.tmp"
+    remaining.to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+    print(f"Retrying {len(jobs)} dead-lettered tickers, {len(remaining)} not_found entries kept")
+    return jobs
+
+
+# Function to get financial indicators for one company and write them out
+def get_indicators(profile, comp_code, journal=None):
+    try:
+        snapshot = fetch_snapshot(profile.symbol(comp_code))
+        write_rows(profile, comp_code, snapshot, journal)
+    except Exception as e:
+        _report_failure(profile, comp_code, e, journal)
+
+
+# Function to queue financial data for the exchange's per-year CSV on the shared writer thread
+def write_to_csv(profile, fin_data, on_written=None):
+    OUTPUT.write(profile.output_file(fin_data["Year"]), fin_data, FIELDNAMES, on_written)
+    for sink in EXTRA_SINKS:
+        sink.write(profile, fin_data)
+
+
+# Additional outputs fed alongside the CSVs, e.g. a ColumnarSink or RowStore; each has write(profile, row) and close()
+EXTRA_SINKS = []
+
+# Optional NegativeCache of symbols that were empty or not found; they are not dispatched until rechecked
+NEGATIVE_CACHE = None
+
+
+def close_outputs():
+    OUTPUT.close()
+    for sink in EXTRA_SINKS:
+        sink.close()
+    compact_dead_letters()
+
+
+# Function to keep one dead-letter entry per (exchange, code, kind), the most recent, after each run
+def compact_dead_letters(path=None):
+    path = path or DEAD_LETTER_FILE
+    if not os.path.exists(path):
+        return
+    letters = pd.read_csv(path, dtype=str)
+    compacted = letters.drop_duplicates(["Exchange", "Company code", "Kind"], keep="last")
+    if len(compacted) == len(letters):
+        return
+    temp_path = f"{path}.tmp"
+    compacted.to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+
+
+# Function to bring the journal in line with the output files and drop tickers that already finished
+def resume_jobs(jobs, journal):
+    done = {}
+    for profile in {profile for profile, _ in jobs}:
+        journal.sync_outputs(profile.output_prefix, "Company code")
+        done[profile] = journal.done_tickers(profile.output_prefix)
+    pending = [(profile, comp_code) for profile, comp_code in jobs if str(comp_code) not in done[profile]]
+    print(f"Resuming: {len(jobs) - len(pending)} tickers already done, {len(pending)} to go")
+    return pending
+
+
+# Function to drop jobs the negative cache says are empty or delisted, before they use a fetch slot
+def skip_negative(jobs):
+    if NEGATIVE_CACHE is None:
+        return jobs
+    negatives = NEGATIVE_CACHE.fresh_symbols()
+    pending = [(profile, comp_code) for profile, comp_code in jobs if profile.symbol(comp_code) not in negatives]
+    print(f"Negative cache: skipping {len(jobs) - len(pending)} known empty or delisted tickers")
+    return pending
+
+
+# Function to run (profile, company code) jobs from any mix of exchanges on one worker pool.
+# With resume=False the journal only deduplicates rows and finished tickers are fetched again.
+# The pool is sized for the concurrency ceiling; the throttle decides how many requests are actually in flight.
+def run(jobs, max_workers=None, journal=None, resume=True):
+    jobs = plan_jobs(jobs)
+    if journal is not None and resume:
+        jobs = resume_jobs(jobs, journal)
+    jobs = skip_negative(jobs)
+    if max_workers is not None:
+        throttle.configure(max_workers=max_workers)
+    http_session.configure(pool_size=throttle.CONCURRENCY.maximum)
+    with ThreadPoolExecutor(max_workers=throttle.CONCURRENCY.maximum) as executor:
+        futures = [executor.submit(get_indicators, profile, comp_code, journal) for profile, comp_code in jobs]
+        for future in futures:
+            future.result()
+    close_outputs()
+
+
+# Timeouts apply to each HTTP request (see http_session), not to the whole fetch, so time spent
+# queueing for a throttle slot or token is never reported as a provider timeout
+async def _get_indicators_async(semaphore, profile, comp_code, journal):
+    try:
+        async with semaphore:
+            snapshot = await asyncio.to_thread(fetch_snapshot, profile.symbol(comp_code))
+        await asyncio.to_thread(write_rows, profile, comp_code, snapshot, journal)
+    except Exception as e:
+        _report_failure(profile, comp_code, e, journal)
+
+
+async def _run_async(jobs, concurrency, journal):
+    semaphore = asyncio.Semaphore(concurrency)
+    # yfinance is blocking, so each fetch runs on a thread from a pool the size of the semaphore
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    tasks = [
+        asyncio.create_task(_get_indicators_async(semaphore, profile, comp_code, journal))
+        for profile, comp_code in jobs
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+# Function to run the same jobs as run() as coroutines, with at most `concurrency` fetches in flight.
+# Each HTTP request gives up after `timeout` seconds; Ctrl-C cancels everything still pending.
+def run_async(jobs, concurrency=64, timeout=30, journal=None, resume=True):
+    jobs = plan_jobs(jobs)
+    if journal is not None and resume:
+        jobs = resume_jobs(jobs, journal)
+    jobs = skip_negative(jobs)
+    throttle.configure(max_workers=concurrency)
+    http_session.configure(pool_size=concurrency, timeout=timeout)
+    try:
+        asyncio.run(_run_async(jobs, concurrency, journal))
+    except KeyboardInterrupt:
+        print("Cancelled: pending tickers were not fetched")
+    finally:
+        close_outputs()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract financial ratios for one or more exchanges")
+    parser.add_argument("exchanges", nargs="*", choices=sorted(PROFILES))
+    parser.add_argument("--workers", type=int, default=16, help="Upper bound for adaptive concurrency")
+    parser.add_argument("--rate", type=float, default=5.0, help="Starting requests per second")
+    parser.add_argument("--max-rate", type=float, default=50.0, help="Ceiling the adaptive request rate may grow to")
+    parser.add_argument("--burst", type=int, default=5, help="Requests allowed back to back")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio fetch pipeline")
+    parser.add_argument("--concurrency", type=int, default=64, help="Fetches in flight in async mode")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-HTTP-request timeout in seconds")
+    parser.add_argument("--columnar", metavar="DIR", help="Also write a typed dataset partitioned by exchange/year")
+    parser.add_argument("--columnar-format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_ROW_STORE, help="Upsert rows into a keyed SQLite store and re-export the per-year CSVs from it")
+    parser.add_argument("--min-market-cap", type=float, default=0.0, help="Skip tickers below this market cap")
+    parser.add_argument("--min-price", type=float, default=0.0, help="Skip tickers below this last price")
+    parser.add_argument("--min-volume", type=float, default=0.0, help="Skip tickers below this traded volume")
+    parser.add_argument("--sector", action="append", default=[], help="Only fetch these sectors (repeatable)")
+    parser.add_argument("--retry-dead-letter", metavar="CSV", help="Only rerun the tickers listed in a dead-letter file")
+    parser.add_argument("--negative-cache", default=DEFAULT_NEGATIVE_CACHE, help="Empty/delisted ticker cache, '' to disable")
+    parser.add_argument("--recheck-days", type=float, default=30, help="Days before a not-found ticker is tried again")
+    parser.add_argument("--recheck-empty-days", type=float, default=1, help="Days before a ticker with empty statements is tried again")
+    parser.add_argument("--incremental", action="store_true", help="Only fetch tickers missing their latest fiscal year")
+    parser.add_argument("--through-year", type=int, help="Latest fiscal year expected in incremental mode (default: last year)")
+    parser.add_argument("--journal", help="SQLite progress journal; finished tickers are skipped on restart")
+    args = parser.parse_args()
+
+    if args.retry_dead_letter:
+        # Failures of this retry go back into the same file
+        DEAD_LETTER_FILE = args.retry_dead_letter
+        jobs = claim_dead_letters(args.retry_dead_letter)
+    elif args.exchanges:
+        prefilter = Prefilter(
+            min_market_cap=args.min_market_cap,
+            min_price=args.min_price,
+            min_volume=args.min_volume,
+            sectors=tuple(args.sector),
+        )
+        jobs = []
+        for name in args.exchanges:
+            profile = PROFILES[name]
+            jobs.extend((profile, comp_code) for comp_code in profile.load_codes(prefilter))
+    else:
+        parser.error("name at least one exchange or pass --retry-dead-letter")
+
+    throttle.configure(rate=args.rate, burst=args.burst, max_rate=args.max_rate)
+    http_session.configure(timeout=args.timeout)
+    if args.negative_cache:
+        NEGATIVE_CACHE = NegativeCache(
+            args.negative_cache, recheck_days=args.recheck_days, empty_recheck_days=args.recheck_empty_days
+        )
+    if args.columnar:
+        from columnar_output import ColumnarSink
+
+        EXTRA_SINKS.append(ColumnarSink(args.columnar, FIELDNAMES, fmt=args.columnar_format))
+    store = None
+    profiles = {profile for profile, _ in jobs}
+    if args.store:
+        store = RowStore(FIELDNAMES, args.store)
+        for profile in profiles:
+            store.import_outputs(profile)
+        EXTRA_SINKS.append(store)
+    journal = SweepJournal(args.journal) if args.journal else None
+    resume = True
+    if args.incremental:
+        # Refreshes revisit finished tickers, so the journal only deduplicates rows here
+        journal = journal or SweepJournal()
+        jobs = stale_jobs(jobs, journal, args.through_year)
+        resume = False
+    if args.use_async:
+        run_async(
+            jobs,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            journal=journal,
+            resume=resume,
+        )
+    else:
+        run(jobs, max_workers=args.workers, journal=journal, resume=resume)
+    if store is not None:
+        # The appended CSVs may hold duplicates from earlier runs; the store has exactly one row per key
+        for profile in profiles:
+            store.export_csv(profile)
+    print("All data processing complete.")
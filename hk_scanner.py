@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+from http_session import get_session
+from resilience import classify_error
+from yf_cache import cached_fetch
+
+try:
+    from yfinance import shared as yf_shared
+except ImportError:  # Releases without the shared error registry
+    yf_shared = None
+
+# Live HK codes found by the last complete scan
+VALID_CODES_FILE = "hk_codes.csv"
+
+# yf.download reports per-symbol failures in a module-level dict instead of raising,
+# so probe downloads run one at a time and the dict is read before the next one starts
+_download_lock = threading.Lock()
+
+
+# Function to pull one field out of a yf.download frame as one column per symbol
+def field_frame(frame, name, symbols):
+    if isinstance(frame.columns, pd.MultiIndex):
+        if name not in frame.columns.get_level_values(0):
+            return pd.DataFrame(index=frame.index)
+        return frame[name]
+    # Older yfinance returns flat columns when only one symbol is requested
+    if name not in frame.columns:
+        return pd.DataFrame(index=frame.index)
+    return frame[[name]].set_axis(symbols, axis=1)
+
+
+# Hong Kong stocks are formatted like '0001.HK', '0700.HK', etc.
+def hk_code_range(start=1700, stop=2000):
+    return [str(comp_code).zfill(4) + ".HK" for comp_code in range(start, stop)]
+
+
+# Function to download a 5-day quote for every symbol and raise if any symbol failed for a reason
+# other than not existing, e.g. a 429 part way through the batch. The raised error is classified
+# like any other, so throttled batches are retried with backoff and never cached as dead codes.
+def _download_probe(symbols):
+    with _download_lock:
+        frame = yf.download(
+            symbols,
+            period="5d",
+            interval="1d",
+            actions=False,
+            group_by="column",
+            threads=False,
+            progress=False,
+            session=get_session(),
+        )
+        errors = dict(getattr(yf_shared, "_ERRORS", None) or {})
+    failures = {
+        symbol: error
+        for symbol, error in errors.items()
+        if symbol in symbols and classify_error(Exception(str(error))) != "not_found"
+    }
+    if failures:
+        symbol, error = next(iter(failures.items()))
+        raise RuntimeError(f"{len(failures)} of {len(symbols)} probes failed, e.g. {symbol}: {error}")
+    return frame
+
+
+# Function to probe one batch of symbols; any close means the code is live.
+# yf.download makes one request per symbol, so the batch is charged one throttle token per symbol.
+def probe_batch(symbols):
+    frame = cached_fetch(
+        "batch",
+        "probe",
+        "price",
+        lambda: _download_probe(symbols),
+        {"symbols": symbols, "period": "5d"},
+        cost=len(symbols),
+    )
+    closes = field_frame(frame, "Close", symbols)
+    return [symbol for symbol in symbols if symbol in closes.columns and closes[symbol].notna().any()]
+
+
+def _probe(batch):
+    try:
+        return probe_batch(batch)
+    except Exception as e:
+        print(f"Probe failed for {batch[0]}..{batch[-1]}: {e}")
+        return None
+
+
+# Function to find which codes in [start, stop) are listed. Batches run one after another (the
+# throttle paces the requests inside each); a batch with any failed symbol is probed once more
+# and, if it fails again, returned as failed instead of counted as empty.
+def discover(start=1, stop=10000, batch_size=200):
+    symbols = hk_code_range(start, stop)
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    results = [_probe(batch) for batch in batches]
+
+    retry = [number for number, found in enumerate(results) if found is None]
+    if retry:
+        print(f"Re-probing {len(retry)} failed batches")
+        for number in retry:
+            results[number] = _probe(batches[number])
+
+    live = [symbol for found in results if found for symbol in found]
+    failed = [batch for batch, found in zip(batches, results) if found is None]
+    print(f"Discovery: {len(live)} live codes out of {len(symbols)} probed, {len(failed)} batches failed")
+    return live, failed
+
+
+def save_valid_codes(codes, path=VALID_CODES_FILE):
+    pd.DataFrame({"Company code": codes}).to_csv(path, index=False)
+
+
+# Function to return the cached live codes, or None when the scan is missing or older than max_age_days
+# (max_age_days=None accepts a scan of any age)
+def load_valid_codes(path=VALID_CODES_FILE, max_age_days=7):
+    if not os.path.exists(path):
+        return None
+    if max_age_days is not None and time.time() - os.path.getmtime(path) > max_age_days * 24 * 3600:
+        return None
+    return list(pd.read_csv(path, dtype=str)["Company code"])
+
+
+# Function to get the live HK codes, rescanning the whole code space only when the cached scan is stale.
+# A scan with failed batches is never saved; for those ranges the previous scan's codes are used instead.
+def live_codes(start=1, stop=10000, max_age_days=7):
+    codes = load_valid_codes(max_age_days=max_age_days)
+    if codes is not None:
+        return codes
+
+    codes, failed = discover(start, stop)
+    if not failed:
+        save_valid_codes(codes)
+        return codes
+
+    unprobed = {symbol for batch in failed for symbol in batch}
+    previous = [symbol for symbol in load_valid_codes(max_age_days=None) or [] if symbol in unprobed]
+    print(f"Scan incomplete, not saved: keeping {len(previous)} codes from the previous scan for failed batches")
+    return sorted(set(codes) | set(previous))
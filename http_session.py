@@ -0,0 +1,58 @@
+import threading
+
+_lock = threading.Lock()
+_session = None
+_pool_size = 16
+_timeout = 30.0
+
+
+# Function to build a keep-alive session shared by the worker threads.
+# Every HTTP request gets `timeout` seconds unless yfinance passes its own per-call timeout.
+# Recent yfinance needs a curl_cffi session; older releases take a plain requests session.
+# Only the requests fallback has a connection pool to size with `pool_size`: curl_cffi's sync
+# Session keeps one curl handle, with its own connection cache, per thread, so it already scales
+# with the worker pool (max_clients belongs to AsyncSession and is not accepted here).
+def build_session(pool_size, timeout=_timeout):
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # requests has no session-wide timeout, so the adapter fills one in for each request
+        class TimeoutAdapter(HTTPAdapter):
+            def send(self, request, **kwargs):
+                if kwargs.get("timeout") is None:
+                    kwargs["timeout"] = timeout
+                return super().send(request, **kwargs)
+
+        session = requests.Session()
+        adapter = TimeoutAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    return curl_requests.Session(impersonate="chrome", timeout=timeout)
+
+
+# Function to size the shared session (requests fallback only) and set the per-request timeout;
+# a change replaces the session
+def configure(pool_size=None, timeout=None):
+    global _session, _pool_size, _timeout
+    with _lock:
+        if pool_size is not None and pool_size != _pool_size:
+            _pool_size = pool_size
+            _session = None
+        if timeout is not None and timeout != _timeout:
+            _timeout = float(timeout)
+            _session = None
+
+
+# Function to return the one session every worker thread shares, so DNS lookups,
+# TCP connections and TLS handshakes are reused across tickers
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = build_session(_pool_size, _timeout)
+        return _session
@@ -0,0 +1,29 @@
+from datetime import date
+
+from work_planner import plan_jobs
+
+
+# Function to pick the newest fiscal year a refresh expects to find: last calendar year by default
+def default_through_year(today=None):
+    return (today or date.today()).year - 1
+
+
+# Function to keep only the jobs whose latest fiscal year is not in the outputs yet.
+# The journal is the manifest: it is synced from the per-year output files, so it reflects
+# every (ticker, year) already written even by runs made without a journal.
+def stale_jobs(jobs, journal, through_year=None):
+    through_year = through_year or default_through_year()
+    # Normalize first so codes match the journal keys written from the outputs
+    jobs = plan_jobs(jobs)
+    latest = {}
+    for profile in {profile for profile, _ in jobs}:
+        journal.sync_outputs(profile.output_prefix, "Company code")
+        latest[profile] = journal.latest_years(profile.output_prefix)
+
+    pending = [
+        (profile, comp_code)
+        for profile, comp_code in jobs
+        if latest[profile].get(str(comp_code), 0) < through_year
+    ]
+    print(f"Incremental: {len(jobs) - len(pending)} tickers already have {through_year}, {len(pending)} to refresh")
+    return pending
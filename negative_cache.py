@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+import time
+
+DEFAULT_NEGATIVE_CACHE = "negative_cache.db"
+
+# Reason recorded for a ticker whose statements came back empty. An empty frame can also be a
+# throttled response in disguise, so these are rechecked much sooner than a confirmed not-found.
+EMPTY_REASON = "empty statements"
+
+
+# Persistent record of symbols that came back empty or not found, so sweeps can skip them
+# until `recheck_days` (`empty_recheck_days` for empty statements) have passed since they were last tried.
+class NegativeCache:
+    def __init__(self, path=DEFAULT_NEGATIVE_CACHE, recheck_days=30, empty_recheck_days=1):
+        self.recheck_seconds = recheck_days * 24 * 3600
+        self.empty_recheck_seconds = empty_recheck_days * 24 * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS negatives (
+                symbol TEXT PRIMARY KEY,
+                reason TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            )"""
+        )
+
+    # Function to list symbols whose negative result is still within the recheck interval
+    def fresh_symbols(self):
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT symbol FROM negatives
+                   WHERE (reason = ? AND checked_at >= ?) OR (reason != ? AND checked_at >= ?)""",
+                (EMPTY_REASON, now - self.empty_recheck_seconds, EMPTY_REASON, now - self.recheck_seconds),
+            ).fetchall()
+        return {symbol for (symbol,) in rows}
+
+    def record(self, symbol, reason):
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO negatives (symbol, reason, checked_at) VALUES (?, ?, ?)
+                   ON CONFLICT (symbol) DO UPDATE SET
+                       reason = excluded.reason, checked_at = excluded.checked_at""",
+                (symbol, reason, time.time()),
+            )
+
+    # Function to forget a symbol once it returns data again
+    def clear(self, symbol):
+        with self._lock:
+            self._conn.execute("DELETE FROM negatives WHERE symbol = ?", (symbol,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
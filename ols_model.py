@@ -1,32 +1,78 @@
+import argparse
+
 import pandas as pd
 import statsmodels.api as sm
 
-# Load the dataset
-df = pd.read_csv("cleaned_hk_fin_data_2022.csv")
-
-# Define dependent variable (Year End Price) and independent variables
-y = df["Year end price"]  # Dependent variable
-x = df[
-    [
-        "EPS",
-        "BVPS",
-        "ROA",
-        "ROE",
-        "DIV",
-        "DAR",
-        "MB",
-        "DY",
-        "P/E Ratio",
-        "Market Cap",
-        "Total Assets",
-    ]
-]  # Independent variables
-
-# Add a constant to the independent variables for the intercept
-x = sm.add_constant(x)
-
-# Fit the OLS model
-result = sm.OLS(y, x).fit()
-
-# Print the summary of results
-print(result.summary())
\ No newline at end of file
+from panel_ols import X_COLUMNS, Y_COLUMN, check_fit, fit_groups, fit_panel, group_codes, load_panel
+
+parser = argparse.ArgumentParser(description="Regress year end price on the financial ratios")
+parser.add_argument("input_file", nargs="?", default="cleaned_hk_fin_data_2022.csv")
+parser.add_argument("--panel", action="store_true", help="Stack every cleaned exchange/year file into one panel")
+parser.add_argument("--effects", action="append", default=[], help="Dummy fixed effect, e.g. Sector or Year (repeatable)")
+parser.add_argument("--absorb", help="Column removed by the within transformation, e.g. 'Company code'")
+parser.add_argument("--cluster", help="Column to cluster standard errors on, e.g. 'Company code'")
+parser.add_argument("--by", action="append", default=[], help="Fit one model per group, e.g. Sector or Year (repeatable)")
+parser.add_argument("--output", help="CSV file for the per-group coefficient table")
+parser.add_argument("--check", action="store_true", help="Check the numpy panel fit against statsmodels and exit")
+args = parser.parse_args()
+
+
+# Function to fit the statsmodels reference for fit_panel on the same rows: the absorbed column
+# becomes explicit dummies (same coefficients and degrees of freedom as the within transformation).
+# Columns are scaled first, since statsmodels on raw Market Cap next to ratios is itself inaccurate.
+# Returns the coefficients and standard errors in the original units.
+def reference_fit(data, absorb=None, cluster=None):
+    x = data[X_COLUMNS].astype(float)
+    if absorb:
+        x = pd.concat([x, pd.get_dummies(data[[absorb]].astype(str), drop_first=True, dtype=float)], axis=1)
+    x = sm.add_constant(x, has_constant="add")
+    scale = x.abs().max().replace(0, 1.0)
+    model = sm.OLS(data[Y_COLUMN], x / scale)
+    if cluster:
+        fit = model.fit(cov_type="cluster", cov_kwds={"groups": group_codes(data, [cluster])[0]})
+    else:
+        fit = model.fit()
+    return fit.params / scale, fit.bse / scale
+
+
+if args.check:
+    # Known-result check: fit_panel must reproduce statsmodels on the same rows
+    data = load_panel() if args.panel else pd.read_csv(args.input_file)
+    data = data.dropna(subset=list(dict.fromkeys([Y_COLUMN, *X_COLUMNS, *(c for c in (args.absorb, args.cluster) if c)])))
+    coef, std_err = reference_fit(data, cluster=args.cluster)
+    error = check_fit(fit_panel(data, cluster=args.cluster), coef, std_err)
+    print(f"Pooled fit matches statsmodels (max relative difference {error:.2g})")
+    if args.absorb:
+        coef, std_err = reference_fit(data, absorb=args.absorb, cluster=args.cluster)
+        error = check_fit(fit_panel(data, absorb=args.absorb, cluster=args.cluster), coef, std_err)
+        print(f"Within fit on {args.absorb} matches statsmodels dummies (max relative difference {error:.2g})")
+elif args.by:
+    # One fit per group of the chosen data (the panel with --panel), all solved in one batched pass
+    data = load_panel() if args.panel else pd.read_csv(args.input_file)
+    table = fit_groups(data, args.by)
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Coefficients for {len(table) // (len(X_COLUMNS) + 1)} groups saved to {args.output}")
+    else:
+        print(table.to_string(index=False))
+elif args.panel:
+    # Pooled or fixed-effects fit over all exchanges and years in one numpy solve
+    panel = load_panel()
+    result = fit_panel(panel, effects=args.effects, absorb=args.absorb, cluster=args.cluster)
+    print(result.summary())
+else:
+    # Load the dataset
+    df = pd.read_csv(args.input_file)
+
+    # Define dependent variable (Year End Price) and independent variables
+    y = df[Y_COLUMN]  # Dependent variable
+    x = df[X_COLUMNS]  # Independent variables
+
+    # Add a constant to the independent variables for the intercept
+    x = sm.add_constant(x)
+
+    # Fit the OLS model; cleaning keeps rows with gaps in non-required columns, so drop those here
+    result = sm.OLS(y, x, missing="drop").fit()
+
+    # Print the summary of results
+    print(result.summary())
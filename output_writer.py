@@ -0,0 +1,104 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+
+_STOP = object()
+
+
+# Single writer thread fed by a queue. Keeps one buffered handle per output file, flushes in
+# batches and runs each caller's callback only after the rows queued before it are on disk.
+class CsvSink:
+    def __init__(self, batch_size=200, flush_interval=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._drain, name="csv-writer", daemon=True)
+                self._thread.start()
+
+    # Function to queue one row for `path`; on_written runs once the row has been flushed
+    def write(self, path, row, fieldnames, on_written=None):
+        self._ensure_started()
+        self._queue.put((path, row, fieldnames, on_written))
+
+    # Function to queue a callback that runs after every row queued so far has been flushed
+    def after_flush(self, callback):
+        self._ensure_started()
+        self._queue.put((None, None, None, callback))
+
+    # Function to flush everything, close all handles and stop the writer thread
+    def close(self):
+        with self._start_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _drain(self):
+        handles = {}
+        callbacks = []
+        pending = 0
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+
+                if item is None or item is _STOP or pending >= self.batch_size:
+                    pending = self._flush(handles, callbacks, pending)
+                if item is _STOP:
+                    break
+                if item is None:
+                    continue
+
+                path, row, fieldnames, on_written = item
+                if path is not None:
+                    self._writer_for(handles, path, fieldnames).writerow(row)
+                    pending += 1
+                if on_written is not None:
+                    callbacks.append(on_written)
+                    if pending == 0:
+                        self._flush(handles, callbacks, pending)
+        finally:
+            self._flush(handles, callbacks, pending)
+            for file, _ in handles.values():
+                file.close()
+
+    @staticmethod
+    def _writer_for(handles, path, fieldnames):
+        if path not in handles:
+            write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+            file = open(path, mode="a", newline="", encoding="utf-8")
+            writer = csv.DictWriter(file, fieldnames=fieldnames)
+            if write_header:
+                writer.writeheader()
+            handles[path] = (file, writer)
+        return handles[path][1]
+
+    @staticmethod
+    def _flush(handles, callbacks, pending):
+        for file, _ in handles.values():
+            file.flush()
+        if pending:
+            print(f"Flushed {pending} rows across {len(handles)} output files")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Writer callback error: {e}")
+        callbacks.clear()
+        return 0
+
+
+# Shared sink for every extraction script in this process
+OUTPUT = CsvSink()
@@ -0,0 +1,217 @@
+import glob
+import math
+import os
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Dependent variable and regressors of the price model in ols_model.py
+Y_COLUMN = "Year end price"
+X_COLUMNS = [
+    "EPS",
+    "BVPS",
+    "ROA",
+    "ROE",
+    "DIV",
+    "DAR",
+    "MB",
+    "DY",
+    "P/E Ratio",
+    "Market Cap",
+    "Total Assets",
+]
+
+# Output prefix of each exchange, as written by extract_engine.py
+EXCHANGES = {"asx_fin_data": "ASX", "hk_fin_data": "HKEX", "fin_data": "SGX"}
+
+_CLEANED_FILE = re.compile(r"^cleaned_(.+)_(\d{4})\.csv$")
+
+
+# Function to stack every cleaned exchange/year file into one frame with an Exchange column
+def load_panel(pattern="cleaned_*.csv"):
+    frames = []
+    for path in sorted(glob.glob(pattern)):
+        match = _CLEANED_FILE.match(os.path.basename(path))
+        if not match:
+            continue
+        frame = pd.read_csv(path, encoding="ISO-8859-1")
+        frame["Exchange"] = EXCHANGES.get(match.group(1), match.group(1))
+        frames.append(frame)
+    if not frames:
+        raise FileNotFoundError(f"No cleaned exchange/year files match '{pattern}'")
+    return pd.concat(frames, ignore_index=True)
+
+
+# Function to number the groups formed by one or more key columns, 0..n-1
+def group_codes(frame, columns):
+    codes = frame.groupby(list(columns), sort=False, observed=True).ngroup().to_numpy()
+    return codes, int(codes.max()) + 1 if len(codes) else 0
+
+
+# Function to sum the rows of a 2-D array per group, one bincount per column
+def group_sums(codes, values, n_groups):
+    return np.column_stack(
+        [np.bincount(codes, weights=column, minlength=n_groups) for column in values.T]
+    )
+
+
+def _p_values(t_values):
+    # Two-sided normal approximation; panels here have thousands of residual degrees of freedom
+    return np.array([math.erfc(abs(t) / math.sqrt(2)) for t in t_values])
+
+
+@dataclass(frozen=True)
+class PanelResult:
+    names: list
+    coef: np.ndarray
+    std_err: np.ndarray
+    r_squared: float
+    nobs: int
+    df_resid: int
+    cov_type: str
+
+    def table(self):
+        t_values = self.coef / self.std_err
+        return pd.DataFrame(
+            {"coef": self.coef, "std err": self.std_err, "t": t_values, "P>|t|": _p_values(t_values)},
+            index=self.names,
+        )
+
+    def summary(self):
+        header = (
+            f"Observations: {self.nobs}  Residual df: {self.df_resid}  "
+            f"R-squared: {self.r_squared:.4f}  Covariance: {self.cov_type}"
+        )
+        return f"{header}\n{self.table().to_string()}"
+
+
+# Function to fit a pooled or fixed-effects OLS on a stacked panel with plain numpy linear algebra.
+# effects: columns turned into dummies (e.g. Sector, Year); absorb: one column removed by the
+# within transformation (e.g. Company code); cluster: column to cluster standard errors on.
+def fit_panel(frame, y=Y_COLUMN, x=X_COLUMNS, effects=(), absorb=None, cluster=None):
+    columns = list(dict.fromkeys([y, *x, *effects, *(c for c in (absorb, cluster) if c)]))
+    data = frame.dropna(subset=columns)
+    Y = data[y].to_numpy(dtype=float)
+    X = data[list(x)].to_numpy(dtype=float)
+    names = list(x)
+
+    if effects:
+        dummies = pd.get_dummies(data[list(effects)].astype(str), drop_first=True, dtype=float)
+        X = np.column_stack([X, dummies.to_numpy()])
+        names += list(dummies.columns)
+
+    absorbed = 0
+    if absorb:
+        # Within transformation: subtract each group's mean instead of adding one dummy per group
+        codes, absorbed = group_codes(data, [absorb])
+        counts = np.bincount(codes, minlength=absorbed)[:, None]
+        Y = Y - (np.bincount(codes, weights=Y, minlength=absorbed) / counts[:, 0])[codes]
+        X = X - (group_sums(codes, X, absorbed) / counts)[codes]
+    else:
+        X = np.column_stack([np.ones(len(Y)), X])
+        names = ["const"] + names
+
+    nobs, k = X.shape
+    df_resid = nobs - k - absorbed
+    if df_resid <= 0:
+        raise ValueError(f"Not enough observations ({nobs}) for {k + absorbed} parameters")
+
+    # Scale columns to comparable magnitudes as in fit_groups: Market Cap and Total Assets next to
+    # ratios make X'X numerically singular, so solve on the scaled design and unscale afterwards
+    scale = np.abs(X).max(axis=0)
+    scale[scale == 0] = 1.0
+    X = X / scale
+
+    coef = np.linalg.lstsq(X, Y, rcond=None)[0]
+    resid = Y - X @ coef
+    bread = np.linalg.pinv(X.T @ X)
+    if cluster:
+        codes, n_clusters = group_codes(data, [cluster])
+        scores = group_sums(codes, X * resid[:, None], n_clusters)
+        correction = n_clusters / (n_clusters - 1) * (nobs - 1) / df_resid
+        cov = correction * bread @ (scores.T @ scores) @ bread
+        cov_type = f"clustered by {cluster} ({n_clusters} clusters)"
+    else:
+        cov = bread * (resid @ resid / df_resid)
+        cov_type = "nonrobust"
+    coef = coef / scale
+    cov = cov / np.outer(scale, scale)
+
+    # With absorb set this is the within R-squared
+    r_squared = 1 - (resid @ resid) / ((Y - Y.mean()) @ (Y - Y.mean()))
+    return PanelResult(names, coef, np.sqrt(np.diag(cov)), r_squared, nobs, df_resid, cov_type)
+
+
+# Function to compare a fit with reference coefficients and standard errors (e.g. from statsmodels)
+# indexed by term; raises ValueError naming the worst term when they differ by more than rtol
+def check_fit(result, coef, std_err, rtol=1e-6):
+    reference = pd.DataFrame({"coef": coef, "std err": std_err}).reindex(result.names)
+    error = ((result.table()[["coef", "std err"]] - reference).abs() / reference.abs()).max(axis=1)
+    worst = error.idxmax() if error.notna().any() else result.names[0]
+    if not error.max() <= rtol:
+        raise ValueError(
+            f"fit differs from the reference by {error.max():.3g} at '{worst}': "
+            f"coef {result.table().loc[worst, 'coef']:.6g} vs {reference.loc[worst, 'coef']:.6g}"
+        )
+    return error.max()
+
+
+# Function to fit one OLS per group (e.g. Sector, Industry, Year, Exchange) in a single batched pass.
+# Rows are sorted by group once, X'X and X'y are summed per group with reduceat and all systems
+# are solved together; rank-deficient groups fall back to the pseudo-inverse. Returns a tidy table
+# with one row per group and term.
+def fit_groups(frame, by, y=Y_COLUMN, x=X_COLUMNS):
+    by = [by] if isinstance(by, str) else list(by)
+    data = frame.dropna(subset=list(dict.fromkeys([y, *x, *by])))
+    if data.empty:
+        raise ValueError("No complete rows to fit")
+    codes, n_groups = group_codes(data, by)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    Y = data[y].to_numpy(dtype=float)[order]
+    X = np.column_stack([np.ones(len(Y)), data[list(x)].to_numpy(dtype=float)[order]])
+    names = ["const"] + list(x)
+    k = len(names)
+
+    # Scale columns to comparable magnitudes so Market Cap and ratios share one well-conditioned system
+    scale = np.abs(X).max(axis=0)
+    scale[scale == 0] = 1.0
+    X = X / scale
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    nobs = np.diff(np.r_[starts, len(codes)])
+    XtX = np.add.reduceat(X[:, :, None] * X[:, None, :], starts, axis=0)
+    XtY = np.add.reduceat(X * Y[:, None], starts, axis=0)
+    YtY = np.add.reduceat(Y * Y, starts)
+    Ysum = np.add.reduceat(Y, starts)
+
+    rank = np.linalg.matrix_rank(XtX)
+    inverse = np.empty_like(XtX)
+    full = rank == k
+    if full.any():
+        inverse[full] = np.linalg.inv(XtX[full])
+    if (~full).any():
+        inverse[~full] = np.linalg.pinv(XtX[~full])
+    coef = np.einsum("gij,gj->gi", inverse, XtY)
+
+    ssr = np.maximum(YtY - np.einsum("gi,gi->g", coef, XtY), 0.0)
+    tss = YtY - Ysum**2 / nobs
+    df_resid = nobs - rank
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = np.where(df_resid > 0, ssr / df_resid, np.nan)
+        std_err = np.sqrt(sigma2[:, None] * np.diagonal(inverse, axis1=1, axis2=2)) / scale
+        r_squared = np.where(tss > 0, 1 - ssr / tss, np.nan)
+    coef = coef / scale
+
+    # First row of every group carries its key values
+    keys = data[by].iloc[order[starts]].reset_index(drop=True)
+    table = keys.loc[keys.index.repeat(k)].reset_index(drop=True)
+    table["term"] = np.tile(names, n_groups)
+    table["coef"] = coef.ravel()
+    table["std err"] = std_err.ravel()
+    table["nobs"] = np.repeat(nobs, k)
+    table["r_squared"] = np.repeat(r_squared, k)
+    table["rank_deficient"] = np.repeat(~full, k)
+    return table
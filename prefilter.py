@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from sgx_snapshot import FUNDAMENTAL_TYPES
+
+# Columns of a ticker universe frame; sources fill what they know and leave the rest NaN
+UNIVERSE_COLUMNS = ["Code", "Market Cap", "Price", "Volume", "Traded Value", "Sector"]
+
+
+def _numeric(frame, column):
+    if column not in frame.columns:
+        return pd.Series(np.nan, index=frame.index)
+    # listcorp exports pad Market Cap with a tab, e.g. "\t262834000000"
+    return pd.to_numeric(frame[column].astype(str).str.strip(), errors="coerce")
+
+
+def _universe(codes, **columns):
+    universe = pd.DataFrame({"Code": list(codes)})
+    for column in UNIVERSE_COLUMNS[1:]:
+        values = columns.get(column)
+        universe[column] = np.nan if values is None else list(values)
+    return universe
+
+
+# Function to read a listcorp company list (companies-list.csv or a part file) as a universe
+def asx_universe(path, limit=None):
+    company_data = pd.read_csv(path)
+    if "Ticker" not in company_data.columns:
+        raise ValueError("The input CSV must have a 'Ticker' column")
+    if limit is not None:
+        company_data = company_data.head(limit)
+    return _universe(
+        company_data["Ticker"],
+        **{
+            "Market Cap": _numeric(company_data, "Market Cap"),
+            "Price": _numeric(company_data, "Last trade"),
+            "Sector": company_data["Sector"] if "Sector" in company_data.columns else None,
+        },
+    )
+
+
+# Function to build the SGX universe from the price snapshot table: statement-filing types, most traded first
+def sgx_universe(table):
+    table = table[table["type"].isin(FUNDAMENTAL_TYPES)].sort_values("v", ascending=False, kind="stable")
+    return _universe(table["nc"], **{"Price": table["lt"], "Volume": table["vl"], "Traded Value": table["v"]})
+
+
+# Function to wrap a bare list of codes as a universe with nothing to filter on
+def codes_universe(codes):
+    return _universe(codes)
+
+
+# Thresholds applied to a universe before any network call. A threshold is only used when the
+# source provides that field; rows with an unknown value for an active threshold are dropped.
+@dataclass(frozen=True)
+class Prefilter:
+    min_market_cap: float = 0.0
+    min_price: float = 0.0
+    min_volume: float = 0.0
+    sectors: tuple = ()
+
+    # Function to drop tickers below the thresholds and order the rest by priority (largest first)
+    def apply(self, universe):
+        keep = pd.Series(True, index=universe.index)
+        for column, minimum in (
+            ("Market Cap", self.min_market_cap),
+            ("Price", self.min_price),
+            ("Volume", self.min_volume),
+        ):
+            if minimum > 0 and universe[column].notna().any():
+                keep &= universe[column] >= minimum
+        if self.sectors and universe["Sector"].notna().any():
+            keep &= universe["Sector"].isin(self.sectors)
+
+        kept = universe[keep]
+        print(f"Prefilter kept {len(kept)} of {len(universe)} tickers")
+        return kept.sort_values(
+            ["Market Cap", "Traded Value"], ascending=False, na_position="last", kind="stable"
+        )
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Statement line items the ratios are built from
+INCOME_ITEMS = ["Net Income", "Basic EPS"]
+BALANCE_ITEMS = [
+    "Stockholders Equity",
+    "Total Assets",
+    "Total Equity Gross Minority Interest",
+    "Total Debt",
+]
+
+# Ratio columns in output order
+RATIO_COLUMNS = [
+    "EPS",
+    "BVPS",
+    "ROA",
+    "ROE",
+    "DIV",
+    "P/E Ratio",
+    "DAR",
+    "MB",
+    "DY",
+    "Market Cap",
+    "Total Assets",
+    "Year end price",
+]
+
+
+# Function to line up one ticker's statements and annual prices as one row per fiscal year.
+# yfinance statements are line items x fiscal year-end dates, so they are transposed and the
+# balance sheet is aligned to the income statement's dates (a missing item or date becomes NaN).
+def ticker_frame(snapshot):
+    income_stmt = snapshot.financials
+    dates = income_stmt.columns
+
+    frame = income_stmt.T.reindex(columns=INCOME_ITEMS)
+    frame = frame.join(snapshot.balance_sheet.T.reindex(index=dates, columns=BALANCE_ITEMS))
+    frame = frame.astype("float64")
+    frame.index = pd.Index([date.year for date in dates], name="Year")
+
+    # Price, dividend and share count come from the snapshot's precomputed annual table
+    return frame.join(snapshot.annual.reindex(frame.index))
+
+
+# Function to collapse a daily series to one value per calendar year, indexed by the year number
+def _by_year(series, how):
+    if series.empty:
+        return pd.Series(dtype="float64")
+    by_year = getattr(series.resample("YE"), how)()
+    by_year.index = by_year.index.year
+    return by_year
+
+
+# Function to build a ticker's per-year table of year-end close, dividends paid and shares outstanding.
+# Built once per ticker so every ratio reads prices by year instead of resampling the daily history.
+def annual_table(history, dividends, shares_outstanding, statement_years=()):
+    year_end_prices = _by_year(history["Close"], "last")
+    dividends_by_year = _by_year(dividends, "sum")
+    years = year_end_prices.index.union(dividends_by_year.index).union(pd.Index(statement_years))
+
+    annual = pd.DataFrame(index=pd.Index(years, name="Year"))
+    annual["Year end price"] = year_end_prices.reindex(years).astype("float64")
+    annual["Dividends"] = dividends_by_year.reindex(years).astype("float64")
+    annual["Shares Outstanding"] = float(shares_outstanding or np.nan)
+    return annual
+
+
+# Function to compute every ratio for every row of a ticker_frame, or of several stacked
+# with pd.concat into a (ticker, year) panel. Divisions by zero come out as NaN, never inf.
+def compute_ratios(frame):
+    price = frame["Year end price"]
+    shares = frame["Shares Outstanding"]
+    total_assets = frame["Total Assets"]
+
+    ratios = pd.DataFrame(index=frame.index)
+    ratios["EPS"] = frame["Basic EPS"]
+    ratios["BVPS"] = frame["Stockholders Equity"] / shares
+    ratios["ROA"] = frame["Net Income"] / total_assets
+    ratios["ROE"] = total_assets / frame["Total Equity Gross Minority Interest"]
+    ratios["DIV"] = frame["Dividends"]
+    ratios["P/E Ratio"] = price / ratios["EPS"]
+    ratios["DAR"] = frame["Total Debt"] / total_assets
+    ratios["MB"] = price / ratios["BVPS"]
+    ratios["DY"] = ratios["DIV"] / price
+    ratios["Market Cap"] = price * shares
+    ratios["Total Assets"] = total_assets
+    ratios["Year end price"] = price
+    return ratios.replace([np.inf, -np.inf], np.nan)
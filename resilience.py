@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+from collections import deque
+
+# Failure kinds worth another attempt; "not_found" and "other" fail straight away
+RETRYABLE = {"throttled", "timeout", "network"}
+
+
+class FetchError(Exception):
+    def __init__(self, kind, cause):
+        super().__init__(f"{kind}: {cause}")
+        self.kind = kind
+        self.cause = cause
+
+
+# Function to sort a fetch failure into not_found / throttled / timeout / network / other
+def classify_error(exc):
+    if isinstance(exc, FetchError):
+        return exc.kind
+    name = type(exc).__name__
+    message = str(exc)
+    lowered = message.lower()
+    if "RateLimit" in name or "429" in message or "too many requests" in lowered:
+        return "throttled"
+    if "Timeout" in name or "timed out" in lowered:
+        return "timeout"
+    if "404" in message or "not found" in lowered or "delisted" in lowered or "no data found" in lowered:
+        return "not_found"
+    if "Connection" in name or "SSL" in name or "connection" in lowered:
+        return "network"
+    return "other"
+
+
+# Function to tell an empty response (no rows, no keys or nothing but NaN) from real data.
+# yfinance answers soft failures and throttling this way when it hides the underlying error.
+def is_empty_response(value):
+    if isinstance(value, dict):
+        return not value
+    if getattr(value, "empty", None) is None:
+        return False
+    return bool(value.empty or value.isna().to_numpy().all())
+
+
+# Trips when `threshold` throttled responses arrive within `window` seconds, then holds
+# every caller for `cooldown` seconds so the whole pool stops hammering the endpoint.
+class CircuitBreaker:
+    def __init__(self, threshold=5, window=60.0, cooldown=120.0):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self._throttles = deque()
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def record_throttle(self):
+        now = time.monotonic()
+        with self._lock:
+            self._throttles.append(now)
+            while self._throttles and now - self._throttles[0] > self.window:
+                self._throttles.popleft()
+            if len(self._throttles) >= self.threshold and now >= self._open_until:
+                self._open_until = now + self.cooldown
+                self._throttles.clear()
+                print(f"Circuit open: {self.threshold} throttled responses, pausing all fetches for {self.cooldown:.0f}s")
+
+
+BREAKER = CircuitBreaker()
+
+
+# Function to make yfinance raise on rate limits and HTTP errors instead of returning empty frames.
+# Newer releases hide them by default (yf.config.debug.hide_exceptions), which would keep throttling
+# away from classify_error, the retries, the circuit breaker and the AIMD limits.
+def surface_yfinance_errors():
+    try:
+        import yfinance as yf
+    except ImportError:
+        return
+    debug = getattr(getattr(yf, "config", None), "debug", None)
+    if debug is not None and hasattr(debug, "hide_exceptions"):
+        debug.hide_exceptions = False
+
+
+# Function to call fetch() with jittered exponential backoff on transient failures.
+# Raises FetchError carrying the failure kind once attempts run out or the error is permanent.
+def call_with_retry(fetch, attempts=4, base_delay=1.0, max_delay=60.0):
+    for attempt in range(attempts):
+        BREAKER.wait()
+        try:
+            return fetch()
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == "throttled":
+                BREAKER.record_throttle()
+            if kind not in RETRYABLE or attempt == attempts - 1:
+                raise FetchError(kind, e) from e
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
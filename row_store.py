@@ -0,0 +1,127 @@
+import csv
+import glob
+import os
+import re
+import sqlite3
+import threading
+
+from columnar_output import TEXT_COLUMNS
+
+DEFAULT_ROW_STORE = "fin_rows.db"
+
+KEY_COLUMNS = ["Exchange", "Company code", "Year"]
+
+_YEAR_FILE = re.compile(r"_(\d{4})\.csv$")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# Text columns stay TEXT, Year is the INTEGER key and every other output column is a REAL metric
+def _column_type(name):
+    if name in TEXT_COLUMNS:
+        return "TEXT"
+    return "INTEGER" if name == "Year" else "REAL"
+
+
+# Keyed store of output rows: one row per (exchange, company code, year), so a rerun replaces a
+# row instead of appending a duplicate. Per-year CSVs are exported from it after a run.
+class RowStore:
+    def __init__(self, fieldnames, path=DEFAULT_ROW_STORE, batch_size=200):
+        self.fieldnames = list(fieldnames)
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        columns = ["Exchange TEXT NOT NULL"]
+        columns += [f"{_quote(name)} {_column_type(name)}" for name in self.fieldnames]
+        columns.append(f"PRIMARY KEY ({', '.join(_quote(name) for name in KEY_COLUMNS)})")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS fin_rows ({', '.join(columns)})")
+
+        names = ["Exchange"] + self.fieldnames
+        updates = [name for name in self.fieldnames if name not in KEY_COLUMNS]
+        placeholders = ", ".join("?" for _ in names)
+        self._insert = f"INSERT INTO fin_rows ({', '.join(_quote(name) for name in names)}) VALUES ({placeholders})"
+        self._upsert = (
+            f"{self._insert} ON CONFLICT ({', '.join(_quote(name) for name in KEY_COLUMNS)}) DO UPDATE SET "
+            + ", ".join(f"{_quote(name)} = excluded.{_quote(name)}" for name in updates)
+        )
+
+    def _values(self, exchange, fin_data):
+        values = [exchange]
+        for name in self.fieldnames:
+            value = fin_data.get(name)
+            if value == "":
+                value = None
+            elif name in TEXT_COLUMNS and value is not None:
+                value = str(value)
+            elif name == "Year":
+                value = int(value)
+            values.append(value)
+        return values
+
+    # Function to queue one row for upsert; rows are written in batches of batch_size
+    def write(self, profile, fin_data):
+        with self._lock:
+            self._pending.append(self._values(profile.name, fin_data))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(self._upsert, self._pending)
+        self._pending.clear()
+
+    # Function to write any queued rows; the store stays usable for exports afterwards
+    def close(self):
+        with self._lock:
+            self._flush()
+
+    # Function to seed the store with rows already in the exchange's per-year CSVs.
+    # Rows already in the store win, so this never overwrites fresher data.
+    def import_outputs(self, profile):
+        imported = 0
+        for path in glob.glob(f"{profile.output_prefix}_*.csv"):
+            if not _YEAR_FILE.search(path):
+                continue
+            with open(path, newline="", encoding="ISO-8859-1") as file:
+                rows = [
+                    self._values(profile.name, row)
+                    for row in csv.DictReader(file)
+                    if row.get("Company code") and row.get("Year")
+                ]
+            with self._lock, self._conn:
+                self._conn.executemany(self._insert.replace("INSERT", "INSERT OR IGNORE", 1), rows)
+            imported += len(rows)
+        return imported
+
+    # Function to rewrite the exchange's per-year CSVs from the store, one row per company and year
+    def export_csv(self, profile):
+        self.close()
+        with self._lock:
+            years = [
+                year
+                for (year,) in self._conn.execute(
+                    "SELECT DISTINCT Year FROM fin_rows WHERE Exchange = ? ORDER BY Year", (profile.name,)
+                )
+            ]
+        for year in years:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(_quote(name) for name in self.fieldnames)} FROM fin_rows "
+                    f'WHERE Exchange = ? AND Year = ? ORDER BY "Company code"',
+                    (profile.name, year),
+                ).fetchall()
+            path = profile.output_file(year)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(self.fieldnames)
+                writer.writerows(rows)
+            os.replace(temp_path, path)
+            print(f"Exported {len(rows)} rows to {path}")
@@ -0,0 +1,126 @@
+import json
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# Numeric fields of an SGX price record: last trade, previous close, open/high/low, change,
+# % change, volume, value, buy/sell volume, bid/ask, and the fund/bond price fields
+PRICE_FIELDS = [
+    "lt", "pv", "o", "h", "l", "c", "p", "vl", "v", "bv", "sv", "b", "s", "cx", "iopv",
+    "dp", "du", "dpc", "iiv", "bond_dirty_price", "bond_clean_price", "bond_accrued_interest",
+    "change_vs_pc_percentage",
+]
+# Text fields; "type" is stored as a category
+TEXT_FIELDS = ["nc", "type", "p_", "v_", "fn", "cn", "ed", "change_vs_pc"]
+# Timestamp fields and their formats
+TIME_FIELDS = {"trading_time": "%Y%m%d_%H%M%S", "ptd": "%Y%m%d", "bond_date": "%Y%m%d"}
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+# Function to yield the records of the "prices" array one at a time from a file object.
+# Only the current chunk and the record being decoded are held in memory, never the whole response.
+def iter_price_records(stream, chunk_size=1 << 16):
+    buffer = ""
+    eof = False
+
+    def read_more():
+        nonlocal buffer, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+    # Skip ahead to the opening bracket of the prices array
+    while True:
+        key = buffer.find('"prices"')
+        start = buffer.find("[", key) if key != -1 else -1
+        if start != -1:
+            buffer = buffer[start + 1:]
+            break
+        if eof:
+            raise ValueError("No 'prices' array in SGX response")
+        # Keep the key if already seen, otherwise a short tail in case it straddles two chunks
+        buffer = buffer[key:] if key != -1 else buffer[-16:]
+        read_more()
+
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE + ",":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            record, end = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer = buffer[position:]
+            position = 0
+            read_more()
+            continue
+        yield record
+        position = end
+        # Drop consumed text so the buffer stays around one chunk in size
+        if position > chunk_size:
+            buffer = buffer[position:]
+            position = 0
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+# Function to stream an SGX price response into a typed columnar table, one column per field
+def load_snapshot(stream):
+    numbers = {field: array("d") for field in PRICE_FIELDS}
+    texts = {field: [] for field in list(TEXT_FIELDS) + list(TIME_FIELDS)}
+    for record in iter_price_records(stream):
+        if record.get("nc") is None:
+            continue
+        for field in PRICE_FIELDS:
+            numbers[field].append(_to_float(record.get(field)))
+        for field, values in texts.items():
+            values.append(record.get(field))
+
+    table = pd.DataFrame({field: texts[field] for field in TEXT_FIELDS})
+    table["type"] = table["type"].astype("category")
+    for field, values in numbers.items():
+        table[field] = np.frombuffer(values, dtype="float64")
+    for field, time_format in TIME_FIELDS.items():
+        table[field] = pd.to_datetime(pd.Series(texts[field], dtype="object"), format=time_format, errors="coerce")
+    return table
+
+
+# Function to persist the table as Parquet (needs pyarrow) or as a NumPy .npz archive
+def save_table(table, path):
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+        return
+    arrays = {}
+    for field in table.columns:
+        if field in TEXT_FIELDS:
+            arrays[field] = table[field].astype("string").fillna("").to_numpy(dtype=str)
+        else:
+            arrays[field] = table[field].to_numpy()
+    np.savez(path, **arrays)
+
+
+def load_table(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    with np.load(path) as archive:
+        table = pd.DataFrame({field: archive[field] for field in archive.files})
+    for field in TEXT_FIELDS:
+        table[field] = table[field].replace("", None)
+    table["type"] = table["type"].astype("category")
+    return table
+
+
+# Security types that file financial statements; warrants, certificates and ETFs do not
+FUNDAMENTAL_TYPES = ("stocks", "reits", "businesstrusts", "adrs")
@@ -0,0 +1,135 @@
+import csv
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_JOURNAL = "sweep_journal.db"
+
+_YEAR_FILE = re.compile(r"_(\d{4})\.csv$")
+
+
+# Durable record of which tickers a sweep has finished and which output rows exist.
+# Rows are keyed by dataset (the output file prefix), so different scripts never collide.
+class SweepJournal:
+    def __init__(self, path=DEFAULT_JOURNAL):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tickers (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                status TEXT NOT NULL,
+                years TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (dataset, ticker)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rows (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                PRIMARY KEY (dataset, ticker, year)
+            )"""
+        )
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _set_status(self, dataset, ticker, status, years=None, error=None):
+        self._execute(
+            """INSERT INTO tickers (dataset, ticker, status, years, error, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (dataset, ticker) DO UPDATE SET
+                   status = excluded.status, years = excluded.years,
+                   error = excluded.error, updated_at = excluded.updated_at""",
+            (dataset, str(ticker), status, years, error, time.time()),
+        )
+
+    def done_tickers(self, dataset):
+        rows = self._execute(
+            "SELECT ticker FROM tickers WHERE dataset = ? AND status = 'done'", (dataset,)
+        )
+        return {ticker for (ticker,) in rows}
+
+    def is_done(self, dataset, ticker):
+        rows = self._execute(
+            "SELECT 1 FROM tickers WHERE dataset = ? AND ticker = ? AND status = 'done'",
+            (dataset, str(ticker)),
+        )
+        return bool(rows)
+
+    def mark_done(self, dataset, ticker, years):
+        self._set_status(dataset, ticker, "done", years=",".join(str(year) for year in sorted(years)))
+
+    def mark_failed(self, dataset, ticker, error):
+        self._set_status(dataset, ticker, "failed", error=str(error))
+
+    def row_written(self, dataset, ticker, year):
+        rows = self._execute(
+            "SELECT 1 FROM rows WHERE dataset = ? AND ticker = ? AND year = ?",
+            (dataset, str(ticker), int(year)),
+        )
+        return bool(rows)
+
+    def record_row(self, dataset, ticker, year):
+        self._execute(
+            "INSERT OR IGNORE INTO rows (dataset, ticker, year) VALUES (?, ?, ?)",
+            (dataset, str(ticker), int(year)),
+        )
+
+    # Function to start a fresh sweep: forget which tickers finished but keep the row index of the outputs,
+    # so a refresh fetches every ticker again without re-appending rows that are already written
+    def reset(self, dataset):
+        self._execute("DELETE FROM tickers WHERE dataset = ?", (dataset,))
+
+    # Function to map each ticker to its latest year present in the outputs
+    def latest_years(self, dataset):
+        rows = self._execute(
+            "SELECT ticker, MAX(year) FROM rows WHERE dataset = ? GROUP BY ticker", (dataset,)
+        )
+        return dict(rows)
+
+    # Function to rebuild the row index from the output files themselves.
+    # A crash between appending a row and recording it is picked up here, so restarts never duplicate rows.
+    def sync_outputs(self, dataset, code_column):
+        synced = 0
+        for path in glob.glob(f"{dataset}_*.csv"):
+            match = _YEAR_FILE.search(path)
+            if not match:
+                continue
+            year = int(match.group(1))
+            _repair_torn_tail(path)
+            with open(path, newline="", encoding="ISO-8859-1") as file:
+                reader = csv.DictReader(file)
+                pairs = [(dataset, row[code_column], year) for row in reader if row.get(code_column)]
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO rows (dataset, ticker, year) VALUES (?, ?, ?)", pairs
+                )
+            synced += len(pairs)
+        return synced
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Function to drop a half-written last line left behind by a crash mid-append
+def _repair_torn_tail(path):
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    with open(path, "rb+") as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) == b"\n":
+            return
+        file.seek(0)
+        data = file.read()
+        file.truncate(data.rfind(b"\n") + 1)
@@ -0,0 +1,143 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from resilience import classify_error, is_empty_response
+
+
+# Token bucket: refills at `rate` tokens per second and holds at most `burst` tokens.
+# The rate adapts AIMD-style between min_rate and max_rate: it rises by `step` after every
+# `increase_every` healthy responses and halves on a 429 or timeout. Equal bounds pin the rate.
+class TokenBucket:
+    def __init__(self, rate, burst, min_rate=None, max_rate=None, step=0.5, increase_every=20):
+        self.min_rate = float(min_rate if min_rate is not None else rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.rate = max(self.min_rate, min(float(rate), self.max_rate))
+        self.burst = float(burst)
+        self.step = step
+        self.increase_every = increase_every
+        self._healthy = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def record_success(self):
+        with self._lock:
+            self._healthy += 1
+            if self._healthy >= self.increase_every and self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.step)
+                self._healthy = 0
+
+    def record_backoff(self):
+        with self._lock:
+            self._healthy = 0
+            self._refill(time.monotonic())
+            new_rate = max(self.min_rate, self.rate / 2)
+            if new_rate != self.rate:
+                print(f"Throttled: lowering request rate from {self.rate:.2f}/s to {new_rate:.2f}/s")
+            self.rate = new_rate
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Additive-increase / multiplicative-decrease limit on requests in flight.
+# The limit grows by one after every `increase_every` healthy responses and halves on a 429 or timeout.
+class AimdController:
+    def __init__(self, initial=3, minimum=1, maximum=16, increase_every=20):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase_every = increase_every
+        self.limit = max(minimum, min(initial, maximum))
+        self._in_flight = 0
+        self._healthy = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record_success(self):
+        with self._cond:
+            self._healthy += 1
+            if self._healthy >= self.increase_every and self.limit < self.maximum:
+                self.limit += 1
+                self._healthy = 0
+                self._cond.notify_all()
+
+    def record_backoff(self):
+        with self._cond:
+            self._healthy = 0
+            new_limit = max(self.minimum, self.limit // 2)
+            if new_limit != self.limit:
+                print(f"Throttled: lowering concurrency from {self.limit} to {new_limit}")
+            self.limit = new_limit
+
+
+# Start at the old five-worker pace and let pushback, not a guessed constant, find the ceiling
+LIMITER = TokenBucket(rate=5.0, burst=5, min_rate=0.5, max_rate=50.0)
+CONCURRENCY = AimdController(initial=5, minimum=1, maximum=16)
+
+
+# Function to replace the shared limiter and controller settings, e.g. from command line flags
+def configure(rate=None, burst=None, min_workers=None, max_workers=None, min_rate=None, max_rate=None):
+    global LIMITER, CONCURRENCY
+    if any(value is not None for value in (rate, burst, min_rate, max_rate)):
+        LIMITER = TokenBucket(
+            rate=rate if rate is not None else LIMITER.rate,
+            burst=burst if burst is not None else LIMITER.burst,
+            min_rate=min_rate if min_rate is not None else LIMITER.min_rate,
+            max_rate=max_rate if max_rate is not None else LIMITER.max_rate,
+        )
+    if min_workers is not None or max_workers is not None:
+        minimum = min_workers if min_workers is not None else CONCURRENCY.minimum
+        maximum = max_workers if max_workers is not None else CONCURRENCY.maximum
+        CONCURRENCY = AimdController(initial=CONCURRENCY.limit, minimum=minimum, maximum=maximum)
+
+
+# Function to tell provider pushback (429s and timeouts) apart from ordinary failures
+def is_backoff_error(exc):
+    return classify_error(exc) in ("throttled", "timeout")
+
+
+# Function to run one network call under the adaptive rate limit and the adaptive concurrency limit.
+# `cost` is the number of HTTP requests the call makes, e.g. one per symbol of a yf.download.
+def guarded_call(fetch, cost=1):
+    controller = CONCURRENCY
+    limiter = LIMITER
+    with controller.slot():
+        for _ in range(cost):
+            limiter.acquire()
+        try:
+            value = fetch()
+        except Exception as e:
+            if is_backoff_error(e):
+                controller.record_backoff()
+                limiter.record_backoff()
+            raise
+    # An empty answer may be a hidden 429, so it never counts towards raising the limits
+    if not is_empty_response(value):
+        controller.record_success()
+        limiter.record_success()
+    return value
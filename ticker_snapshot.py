@@ -0,0 +1,50 @@
+import yfinance as yf
+import pandas as pd
+from dataclasses import dataclass
+from types import MappingProxyType
+from http_session import get_session
+from ratios import annual_table
+from yf_cache import cached_fetch
+
+
+# Everything get_indicators needs for one ticker, downloaded exactly once
+@dataclass(frozen=True)
+class TickerSnapshot:
+    symbol: str
+    financials: pd.DataFrame
+    balance_sheet: pd.DataFrame
+    info: MappingProxyType
+    dividends: pd.Series
+    history: pd.DataFrame
+    annual: pd.DataFrame  # Year-end close, dividends and shares outstanding, indexed by year
+
+
+# Function to fetch financials, balance sheet, info, dividends and max history in one pass.
+# Every endpoint goes through the on-disk cache, so warm reruns make no network calls.
+def fetch_snapshot(symbol):
+    ticker = yf.Ticker(symbol, session=get_session())
+    financials = cached_fetch(symbol, "financials", "statement", lambda: ticker.financials)
+    balance_sheet = cached_fetch(symbol, "balance_sheet", "statement", lambda: ticker.balance_sheet)
+    info = MappingProxyType(dict(cached_fetch(symbol, "info", "info", lambda: ticker.info)))
+
+    # No statement years means the ratio loop never runs, so skip the price downloads
+    if financials.empty:
+        dividends = pd.Series(dtype="float64")
+        history = pd.DataFrame(columns=["Close"])
+    else:
+        dividends = cached_fetch(symbol, "dividends", "price", lambda: ticker.dividends)
+        history = cached_fetch(
+            symbol, "history", "price", lambda: ticker.history(period="max"), {"period": "max"}
+        )
+
+    return TickerSnapshot(
+        symbol=symbol,
+        financials=financials,
+        balance_sheet=balance_sheet,
+        info=info,
+        dividends=dividends,
+        history=history,
+        annual=annual_table(
+            history, dividends, info.get("sharesOutstanding"), [date.year for date in financials.columns]
+        ),
+    )
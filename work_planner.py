@@ -0,0 +1,31 @@
+import glob
+
+import pandas as pd
+
+# listcorp exports split into parts; the same ticker can appear in more than one part
+ASX_PART_FILES = "companies_list_part_*.csv"
+
+
+# Function to merge any number of (profile, code) lists into one work plan.
+# Codes are normalized per exchange and each (exchange, code) item appears once, in first-seen order.
+def plan_jobs(*job_lists):
+    plan = {}
+    listed = 0
+    for jobs in job_lists:
+        for profile, comp_code in jobs:
+            listed += 1
+            code = profile.normalize(comp_code)
+            if code:
+                plan.setdefault((profile, code), None)
+    if listed != len(plan):
+        print(f"Work plan: {len(plan)} unique tickers from {listed} listed")
+    return list(plan)
+
+
+# Function to read a ticker column from every CSV matching `pattern` as (profile, code) jobs
+def csv_jobs(profile, pattern, column="Ticker"):
+    jobs = []
+    for path in sorted(glob.glob(pattern)):
+        company_data = pd.read_csv(path, usecols=[column], dtype=str)
+        jobs.extend((profile, comp_code) for comp_code in company_data[column].dropna())
+    return jobs
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from resilience import call_with_retry, is_empty_response
+from throttle import guarded_call
+
+# On-disk cache for yfinance responses, keyed by (ticker, endpoint, params).
+# Settings can be overridden with YF_CACHE_DIR, YF_CACHE_MAX_MB and YF_OFFLINE=1.
+CACHE_DIR = os.environ.get("YF_CACHE_DIR", ".yf_cache")
+MAX_BYTES = int(os.environ.get("YF_CACHE_MAX_MB", "1024")) * 1024 * 1024
+OFFLINE = os.environ.get("YF_OFFLINE", "") == "1"
+
+# How long each kind of data stays fresh, in seconds
+TTL_SECONDS = {
+    "statement": 7 * 24 * 3600,  # Annual statements change once a year
+    "info": 24 * 3600,
+    "price": 6 * 3600,
+}
+# Empty or all-NaN responses are what yfinance returns on soft failures and throttling,
+# so they are only kept long enough to avoid refetching within one run
+EMPTY_TTL_SECONDS = 30 * 60
+
+_lock = threading.Lock()
+_size_bytes = None  # Running estimate of the cache size, filled on first write
+
+
+class CacheMiss(KeyError):
+    pass
+
+
+# Function to change the cache location, size bound or offline mode at runtime
+def configure(cache_dir=None, max_mb=None, offline=None):
+    global CACHE_DIR, MAX_BYTES, OFFLINE, _size_bytes
+    with _lock:
+        if cache_dir is not None:
+            CACHE_DIR = cache_dir
+            _size_bytes = None
+        if max_mb is not None:
+            MAX_BYTES = int(max_mb) * 1024 * 1024
+        if offline is not None:
+            OFFLINE = offline
+
+
+def cache_key(symbol, endpoint, params=None):
+    raw = json.dumps([symbol, endpoint, params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.pkl")
+
+
+# Function to return a cached response, calling fetch() only when the entry is missing or stale.
+# `cost` is how many HTTP requests fetch() makes, so multi-symbol calls take one token per request.
+def cached_fetch(symbol, endpoint, kind, fetch, params=None, cost=1):
+    path = _entry_path(cache_key(symbol, endpoint, params))
+
+    try:
+        with open(path, "rb") as file:
+            written_at, value = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        written_at, value = None, None
+
+    ttl = EMPTY_TTL_SECONDS if is_empty_response(value) else TTL_SECONDS[kind]
+    if written_at is not None and (OFFLINE or time.time() - written_at < ttl):
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    if OFFLINE:
+        raise CacheMiss(f"{symbol} {endpoint} is not cached and offline mode is on")
+
+    value = call_with_retry(lambda: guarded_call(fetch, cost))
+    _store(path, value)
+    return value
+
+
+def _store(path, value):
+    global _size_bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temp file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        pickle.dump((time.time(), value), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    with _lock:
+        if _size_bytes is None:
+            _size_bytes = sum(size for _, size, _ in _scan_entries())
+        else:
+            _size_bytes += os.path.getsize(path)
+        if _size_bytes > MAX_BYTES:
+            _size_bytes = _evict(int(MAX_BYTES * 0.9))
+
+
+def _scan_entries():
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if not name.endswith(".pkl"):
+                continue
+            entry = os.path.join(root, name)
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            yield entry, stat.st_size, stat.st_mtime
+
+
+# Function to drop least recently used entries until the cache fits in target_bytes
+def _evict(target_bytes):
+    entries = sorted(_scan_entries(), key=lambda entry: entry[2])
+    total = sum(size for _, size, _ in entries)
+    for entry, size, _ in entries:
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(entry)
+            total -= size
+        except OSError:
+            pass
+    return total